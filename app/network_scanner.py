@@ -1,12 +1,27 @@
 from __future__ import annotations
 import asyncio
-import subprocess
+import functools
+import json
 import logging
-from abc import ABC, abstractmethod
-from typing import Callable, List, Optional, Type
+import os
+import re
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Protocol, Set, Tuple
 import scapy.all as scapy
 import socket
-import warnings
+
+try:
+    import re2 as regex  # type: ignore
+except ImportError:
+    regex = re
+
+try:
+    import psutil  # type: ignore
+except ImportError:
+    psutil = None
 
 logger = logging.getLogger('network_scanner')
 logger.setLevel(logging.INFO)
@@ -17,156 +32,588 @@ ch.setFormatter(formatter)
 logger.addHandler(ch)
 
 
-class ScanStrategy(ABC):
+def install_event_loop_policy():
+    """Uses uvloop where it's installed. Windows gets the proactor loop, which handles subprocess pipes best."""
+    if sys.platform == 'win32':
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+        return
+    try:
+        import uvloop  # type: ignore
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+ARP_IP_RE = re.compile(rb'\d+\.\d+\.\d+\.\d+')
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+
+def icmp_checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+class RawPingScanner:
+    """
+    Sends ICMP echo requests over a single raw socket and matches replies by sequence number,
+    so a whole subnet can be pinged without spawning a process per host.
+    Raises OSError if raw sockets aren't permitted and NotImplementedError if the loop can't watch them.
+    """
+    __slots__ = ('loop', 'timeout', '_id', '_seq', '_pending', '_sock')
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, timeout: float = 1.):
+        self.loop = loop
+        self.timeout = timeout
+        self._id = os.getpid() & 0xFFFF
+        self._seq = 0
+        self._pending: Dict[int, Tuple[str, asyncio.Future]] = {}
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        self._sock.setblocking(False)
+        try:
+            self.loop.add_reader(self._sock.fileno(), self._on_readable)
+        except NotImplementedError:
+            self._sock.close()
+            raise
+
+    def close(self):
+        if not self.loop.is_closed():
+            self.loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+
+    def _packet(self, seq: int) -> bytes:
+        header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, self._id, seq)
+        return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, icmp_checksum(header), self._id, seq)
+
+    def _submit(self, ip: str) -> int:
+        self._seq = (self._seq + 1) & 0xFFFF
+        fut = self.loop.create_future()
+        self._pending[self._seq] = (ip, fut)
+        try:
+            self._sock.sendto(self._packet(self._seq), (ip, 0))
+        except OSError as e:
+            logger.debug("Failed to send echo request to %s: %s", ip, e)
+            fut.set_result(False)
+        return self._seq
+
+    def _on_readable(self):
+        while True:
+            try:
+                data, (addr, _) = self._sock.recvfrom(1024)
+            except (BlockingIOError, InterruptedError):
+                return
+            ihl = (data[0] & 0x0F) * 4
+            if len(data) < ihl + 8:
+                continue
+            icmp_type, _, _, ident, seq = struct.unpack('!BBHHH', data[ihl:ihl + 8])
+            if icmp_type != ICMP_ECHO_REPLY or ident != self._id:
+                continue
+            pending = self._pending.get(seq)
+            if pending and pending[0] == addr and not pending[1].done():
+                pending[1].set_result(True)
+
+    async def ping_many(self, ips: Iterable[str], timeout: Optional[float] = None) -> Set[str]:
+        """Pings every ip at once and returns the set that replied within the timeout."""
+        seqs = [self._submit(ip) for ip in ips]
+        if seqs:
+            await asyncio.wait([self._pending[seq][1] for seq in seqs], timeout=timeout or self.timeout)
+        responders = set()
+        for seq in seqs:
+            ip, fut = self._pending.pop(seq)
+            if fut.done() and fut.result():
+                responders.add(ip)
+            else:
+                fut.cancel()
+        return responders
+
+    async def ping(self, ip: str, timeout: Optional[float] = None) -> bool:
+        return ip in await self.ping_many((ip,), timeout)
+
+
+class ScanStrategyProtocol(Protocol):
+    """What NetworkScanner needs from a strategy; last_ip is where the target was last found, if known."""
+    last_ip: Optional[str]
+
+    async def on_network(self) -> bool: ...
+
+    def close(self) -> None: ...
+
+
+class ScanStrategy:
+    __slots__ = ('interface', 'last_ip')
+
     def __init__(self, interface: NetworkScanner):
         self.interface = interface
-    
-    @abstractmethod
-    async def on_network(self):
+        # Where the target was last found, for strategies that discover its ip
+        self.last_ip: Optional[str] = None
+
+    def close(self):
         pass
 
 
 class IpScanStrategy(ScanStrategy):
+    __slots__ = ('ip', '_ip_re')
+
     def __init__(self, interface: NetworkScanner, ip: Optional[str] = None):
         super().__init__(interface)
         self.interface = interface
         self.ip = ip or self.interface.ip
+        # Anchored so 192.168.0.1 doesn't match 192.168.0.10; works for /proc/net/arp, Windows and BSD `arp -a` alike
+        self._ip_re = re.compile(rb'(?<![\d.])' + re.escape(self.ip.encode('ascii')) + rb'(?![\d.])') if self.ip else None
     
     async def on_network(self) -> bool:
         if not self.ip:
             return False
-        arpa = subprocess.check_output(("arp", "-a")).decode("ascii")
-        return self.ip in arpa
+        if self._ip_re.search(await self.interface._get_arp()):
+            return True
+        # Not in the ARP table yet, so ping it to make the OS resolve it and look again
+        await self.interface.ping(self.ip)
+        self.interface._arp_cache = None
+        return bool(self._ip_re.search(await self.interface._get_arp()))
 
 
 class MacScanStrategy(ScanStrategy):
+    __slots__ = ('mac', '_mac_bytes')
+
     def __init__(self, interface: NetworkScanner, mac: Optional[str] = None):
         super().__init__(interface)
         self.interface = interface
         self.mac = mac or self.interface.mac
+        # Windows writes MACs with dashes, Linux and macOS with colons
+        mac_bytes = self.mac.lower().replace(':', '-').encode('ascii') if self.mac else b''
+        self._mac_bytes = (mac_bytes, mac_bytes.replace(b'-', b':'))
     
     async def on_network(self) -> bool:
         if not self.mac:
             return False
-        arpa = subprocess.check_output(("arp", "-a")).decode("ascii")
-        return self.mac in arpa
+        macs = self._mac_bytes
+        arpa = await self.interface._get_arp()
+        if any(mac in arpa for mac in macs):
+            return True
+        # Only an ip can be pinged, so prime the ARP table with a subnet sweep and look again
+        await self.interface.scan_network()
+        arpa = await self.interface._get_arp()
+        return any(mac in arpa for mac in macs)
 
 
 class HostnameScanStrategy(IpScanStrategy):
+    __slots__ = ('prefix', 'hostname', '_hostname_re', '_arp', '_arp_available')
+
     def __init__(self, interface: NetworkScanner, hostname: Optional[str] = None):
         super().__init__(interface, ip=interface.ip)
         self.prefix = self.interface.prefix
         self.hostname = hostname or self.interface.hostname
+        self._hostname_re = regex.compile(re.escape(self.hostname.encode()))
+        self._arp = ScapyScanStragetgy(interface, router_ip=self.prefix + '1', hostname=self.hostname)
+        self._arp_available = True
     
     async def on_network(self) -> bool:
-        tasks = [asyncio.create_task(self.interface.ping(self.prefix + str(i), get_hostname=True)) for i in range(255)]
-        ping_output = await asyncio.gather(*tasks)
-        return any(self.hostname in x for x in ping_output)
+        if self._arp_available:
+            try:
+                await self._arp.scan(self._arp.router_ip)
+            except (OSError, RuntimeError, scapy.Scapy_Exception) as e:
+                # Missing privileges or no capture driver (Npcap/BPF), which won't fix themselves, so stop retrying
+                logger.warning("ARP broadcast failed (%s), falling back to ping sweep", e)
+                self._arp_available = False
+        # The broadcast can miss the name (the router always answers, DNS may not know the host), so a miss
+        # still falls through to the ping sweep
+        if self._arp.available_networks and await self._arp.match_hostname():
+            self.last_ip = self._arp.last_ip
+            return True
+        prefix = self.prefix
+        ips = [prefix + str(i) for i in range(255)]
+        # Where we last found the host is the likeliest place to find it again, so ping it first
+        if self.last_ip in ips:
+            ips.remove(self.last_ip)
+            ips.insert(0, self.last_ip)
+        tasks = [asyncio.create_task(self._ping_hostname(ip)) for ip in ips]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                ip, out = await fut
+                if out and self._hostname_re.search(out):
+                    self.last_ip = ip
+                    return True
+        finally:
+            for task in tasks:
+                task.cancel()
+        return False
+
+    def close(self):
+        self._arp.close()
+
+    async def _ping_hostname(self, ip: str) -> Tuple[str, Optional[bytes]]:
+        return ip, await self.interface.ping(ip, get_hostname=True)
 
 class ScapyScanStragetgy(ScanStrategy):
     """
-    Slow as hell- probably don't use this yet
+    Finds every host on the subnet with a single ARP broadcast, then matches them by MAC if one is known,
+    otherwise reverse-resolves them all at once and stops at the first one matching the hostname.
+    Names are compared case-insensitively on their first label, so DIETPI matches dietpi.lan.
     """
+    __slots__ = ('available_networks', '_request_broadcast', '_s', 'router_ip', 'hostname', '_hostname_label')
+
     def __init__(self, interface, router_ip='192.168.0.1', hostname: Optional[str] = None):
-        warnings.warn("ScapyScanStragetgy is slow and probably not used", DeprecationWarning)
         super().__init__(interface)
         self.interface = interface
         self.available_networks = []
-        self.request = scapy.ARP()
-        self.broadcast = scapy.Ether()
-        self.broadcast.dst = 'ff:ff:ff:ff:ff:ff'
+        self._request_broadcast = scapy.Ether(dst='ff:ff:ff:ff:ff:ff') / scapy.ARP()
+        self._s = None
         self.router_ip = router_ip
         self.hostname = hostname or self.interface.hostname
+        self._hostname_label = self.hostname.split('.', 1)[0].lower() if self.hostname else None
 
     async def scan(self, net_area):
         await self.IP_Scan(net_area, 24)
 
+    def _socket(self):
+        # Opening an L2 socket (and compiling its filter) costs far more than the broadcast itself, so keep one open.
+        # It only accepts ARP, otherwise every frame seen between scans would queue up and be dissected by the next sr
+        if self._s is None:
+            self._s = scapy.conf.L2socket(iface=self.interface.interface_name or scapy.conf.iface, filter='arp')
+        return self._s
+
+    def close(self):
+        if self._s is not None:
+            self._s.close()
+            self._s = None
+
     async def IP_Scan(self, net_area, net_mask):
         self.available_networks.clear()
-        self.request.pdst = f'{net_area}/{net_mask}'
-        request_broadcast = self.broadcast / self.request
-        clients = scapy.srp(request_broadcast, timeout=5)[0]
-        for _, received_ip in clients:
-            try:
-                name = socket.gethostbyaddr(received_ip.psrc)[0]
-            except Exception:
-                continue
-            self.available_networks.append({'IP': received_ip.psrc, 'MAC': received_ip.hwsrc, 'Name': name})
+        self._request_broadcast[scapy.ARP].pdst = f'{net_area}/{net_mask}'
+        sr = functools.partial(self._socket().sr, self._request_broadcast, timeout=1, verbose=0)
+        clients = (await asyncio.get_running_loop().run_in_executor(None, sr))[0]
+        self.available_networks.extend({'IP': received_ip.psrc, 'MAC': received_ip.hwsrc} for _, received_ip in clients)
+
+    async def match_hostname(self) -> bool:
+        # A known MAC identifies the host without any reverse DNS
+        if self.interface.mac:
+            mac = self.interface.mac.replace('-', ':')
+            for client in self.available_networks:
+                if client['MAC'] == mac:
+                    self.last_ip = client['IP']
+                    return True
+            return False
+        tasks = [asyncio.create_task(self._resolve(client['IP'])) for client in self.available_networks]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                ip, name = await fut
+                if name and name.split('.', 1)[0].lower() == self._hostname_label:
+                    self.last_ip = ip
+                    return True
+        finally:
+            for task in tasks:
+                task.cancel()
+        return False
+
+    async def _resolve(self, ip: str) -> Tuple[str, Optional[str]]:
+        try:
+            name = (await asyncio.get_running_loop().getnameinfo((ip, 0), socket.NI_NAMEREQD))[0]
+        except OSError:
+            name = None
+        return ip, name
 
     async def on_network(self):
         await self.scan(self.router_ip)
-        return self.hostname in [x['Name'] for x in self.available_networks]
+        return await self.match_hostname()
 
 
 class NetworkScanner:
-    def __init__(self, ip: Optional[str] = None, mac: Optional[str] = None, hostname: Optional[str] = None, strategy: Type[ScanStrategy] = IpScanStrategy):
+    __slots__ = ('ip', 'mac', 'prefix', 'hostname', 'interface_name', '_interface_ip', '_fullname', 'loop', 'strategy',
+                 '_pinger', '_raw_ping_available', '_max_concurrent_pings', '_ping_sem', '_arp_cache', '_arp_ts', '_scan_lock',
+                 '_saved_state', '_bound_loop')
+    _state_file = Path('~/.netmon/last_state.json')
+    _state_max_age = 60.
+
+    def __init__(self, ip: Optional[str] = None, mac: Optional[str] = None, hostname: Optional[str] = None, strategy: Callable[[NetworkScanner], ScanStrategyProtocol] = IpScanStrategy,
+                 max_concurrent_pings: int = 32, interface_name: Optional[str] = None):
         self.ip = ip
-        self._mac = mac
+        self.mac = mac.lower().replace(':', '-') if mac else None
+        self.prefix = '.'.join(ip.split('.')[0:3]) + '.' if ip else ''
         self.hostname = hostname
+        self.interface_name = interface_name
+        self._interface_ip: Optional[str] = None
+        self._detect_interface()
+        self._fullname = "\t".join(map(str, [self.ip, self.mac, self.hostname]))
         self.loop = asyncio.get_event_loop()
-        self.strategy = strategy(self)
+        self.strategy: ScanStrategyProtocol = strategy(self)
+        self._pinger: Optional[RawPingScanner] = None
+        self._raw_ping_available = True
+        self._max_concurrent_pings = max_concurrent_pings
+        self._ping_sem: Optional[asyncio.Semaphore] = None
+        self._arp_cache: Optional[bytes] = None
+        self._arp_ts = 0.
+        self._scan_lock: Optional[asyncio.Lock] = None
+        self._saved_state: Optional[Tuple[Optional[str], float]] = None
+        self._bound_loop: Optional[asyncio.AbstractEventLoop] = None
 
     @property
-    def mac(self) -> Optional[str]:
-        if not self._mac:
-            return None
-        return self._mac.lower().replace(':','-')
+    def fullname(self) -> str:
+        return self._fullname
 
     @property
-    def prefix(self) -> str:
-        if self.ip:
-            return '.'.join(self.ip.split('.')[0:3]) + '.'
-        else:
-            return ''
+    def _state_path(self) -> Path:
+        # Resolved on use, since expanduser raises RuntimeError when there's no home directory
+        return self._state_file.expanduser()
 
-    @property
-    def fullname(self) -> str:
-        return "\t".join(map(str, [self.ip, self.mac, self.hostname]))
-
-    async def ping(self, ip: str, get_hostname: Optional[bool] = False) -> Optional[str]:
-        proc = await asyncio.create_subprocess_shell(' '.join(['ping', '-n', '1','-w','100','-a' if get_hostname else '', ip]), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
-        stdout, stderr = await proc.communicate()
-        if stderr:
-            logger.error(stderr.decode())
-            return stderr.decode()
-        elif stdout:
-            logger.debug(stdout.decode())
-            return stdout.decode()
+    def _detect_interface(self):
+        """
+        Finds the local interface on the monitored subnet (or the address of the one given) so ARP reads can be
+        limited to it. Needs psutil; without it only an explicit interface_name applies, and not on Windows,
+        where arp filters by the interface's address.
+        """
+        if psutil is None:
+            return
+        for name, addrs in psutil.net_if_addrs().items():
+            if self.interface_name and name != self.interface_name:
+                continue
+            for addr in addrs:
+                if addr.family == socket.AF_INET and (self.interface_name or (self.prefix and addr.address.startswith(self.prefix))):
+                    self.interface_name, self._interface_ip = name, addr.address
+                    return
+
+    def _bind_loop(self):
+        """
+        The raw pinger, ping semaphore and scan lock all belong to the loop they were made in, so drop them
+        when a new loop (e.g. a second asyncio.run) starts using the scanner.
+        """
+        loop = asyncio.get_running_loop()
+        if self._bound_loop is loop:
+            return
+        if self._pinger is not None:
+            self._pinger.close()
+            self._pinger = None
+        self._ping_sem = None
+        self._scan_lock = None
+        self._bound_loop = loop
+
+    def _get_pinger(self) -> Optional[RawPingScanner]:
+        self._bind_loop()
+        if self._pinger is None and self._raw_ping_available:
+            try:
+                self._pinger = RawPingScanner(asyncio.get_running_loop())
+            except (OSError, NotImplementedError) as e:
+                logger.warning("Raw ICMP sockets unavailable (%s), falling back to ping subprocesses", e)
+                self._raw_ping_available = False
+        return self._pinger
+
+    def _get_ping_sem(self) -> asyncio.Semaphore:
+        # Created inside the running loop; before 3.10 a semaphore binds to whatever loop exists when it's built
+        self._bind_loop()
+        if self._ping_sem is None:
+            self._ping_sem = asyncio.Semaphore(self._max_concurrent_pings)
+        return self._ping_sem
+
+    async def ping(self, ip: str, get_hostname: Optional[bool] = False) -> Optional[bytes]:
+        """
+        Without get_hostname this sends a single echo request over the shared raw socket and returns the encoded ip if it replied.
+        Hostname lookups (and hosts without raw socket access) still go through the OS ping command and return its raw output;
+        at most max_concurrent_pings of those run at a time.
+        """
+        pinger = None if get_hostname else self._get_pinger()
+        if pinger:
+            return ip.encode() if await pinger.ping(ip) else None
+        async with self._get_ping_sem():
+            # Launching every ping at once drops replies, so stagger them slightly
+            await asyncio.sleep(0.005)
+            proc = await asyncio.create_subprocess_exec('ping', '-n', '1', '-w', '100', *(('-a',) if get_hostname else ()), ip,
+                                                        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+            try:
+                stdout = await proc.stdout.read()
+                await proc.wait()
+            except asyncio.CancelledError:
+                try:
+                    proc.kill()
+                except ProcessLookupError:
+                    pass
+                raise
+            if stdout:
+                logger.debug(stdout)
+                return stdout
+            else:
+                return None
+
+    async def _read_arp(self) -> bytes:
+        """
+        Returns the raw ARP table, limited to interface_name when one is known. On Linux that's a single read
+        of /proc/net/arp without the incomplete entries, elsewhere it's the output of `arp -a`.
+        """
+        if sys.platform.startswith('linux'):
+            with open('/proc/net/arp', 'rb') as f:
+                lines = f.read().splitlines()
+            device = self.interface_name.encode() if self.interface_name else None
+            # Flags 0x0 marks entries the kernel is still resolving or failed to resolve
+            return b'\n'.join(line for line in lines
+                               if b' 0x0 ' not in line and (device is None or line.rsplit(None, 1)[-1] == device))
+        cmd = ['arp', '-a']
+        if sys.platform == 'win32' and self._interface_ip:
+            cmd += ['-N', self._interface_ip]
+        elif sys.platform == 'darwin' and self.interface_name:
+            cmd += ['-i', self.interface_name]
+        proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE)
+        stdout, _ = await proc.communicate()
+        return stdout
+
+    async def _get_arp(self, max_age: float = 0.5) -> bytes:
+        """Returns the ARP table, reusing the last read if it's fresher than max_age seconds."""
+        if self._arp_cache is None or time.monotonic() - self._arp_ts > max_age:
+            self._arp_cache = await self._read_arp()
+            self._arp_ts = time.monotonic()
+        return self._arp_cache
+
+    async def _flush_arp(self):
+        """
+        Clears the ARP table (just interface_name's entries where the platform allows) so stale entries stop
+        counting as online hosts. Needs admin/root.
+        """
+        if sys.platform == 'win32':
+            cmd = ['arp', '-d', '*'] + ([self._interface_ip] if self._interface_ip else [])
+        elif sys.platform == 'darwin':
+            # macOS arp's -i only scopes display, so deletes always hit every interface
+            cmd = ['arp', '-a', '-d']
         else:
-            return None
+            cmd = ['ip', 'neigh', 'flush'] + (['dev', self.interface_name] if self.interface_name else ['all'])
+        self._arp_cache = None
+        try:
+            proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        except OSError as e:
+            logger.warning("Failed to flush the ARP table with %s: %s", ' '.join(cmd), e)
+            return
+        if await proc.wait():
+            logger.warning("Failed to flush the ARP table with %s", ' '.join(cmd))
 
-    async def scan_network(self) -> List[str]:
-        """Currently just returns nasty network output. Useful for string-matching though. """
-        tasks = [asyncio.create_task(self.ping(self.prefix + str(i))) for i in range(255)]
-        await asyncio.gather(*tasks)
-        arpa = subprocess.check_output(("arp", "-a")).decode("ascii")
-        return [x for x in arpa.split('\n') if self.prefix in x]
+    async def scan_network(self) -> Set[str]:
+        """
+        Pings every host on the subnet that isn't already in the ARP table, priming the table as a side effect.
+        Returns the set of ips that replied.
+        """
+        prefix = self.prefix
+        prefix_bytes = prefix.encode('ascii')
+        arpa = await self._get_arp()
+        known = {int(ip.rsplit(b'.', 1)[1]) for ip in ARP_IP_RE.findall(arpa) if ip.startswith(prefix_bytes)}
+        ips = [prefix + str(i) for i in range(255) if i not in known]
+        pinger = self._get_pinger()
+        if pinger:
+            responders = await pinger.ping_many(ips)
+        else:
+            tasks = [asyncio.create_task(self.ping(ip)) for ip in ips]
+            ping_output = await asyncio.gather(*tasks)
+            responders = {ip for ip, out in zip(ips, ping_output) if out and b'TTL=' in out.upper()}
+        self._arp_cache = None
+        return responders
 
     async def on_network(self) -> bool:
         return await self.strategy.on_network()
 
-    async def monitor(self, cb: Callable, interval: float = 1., cb_on_change_only: Optional[bool] = False):
+    def _load_state(self) -> Optional[dict]:
+        """Returns what a previous run saved about this target, if it was seen within the last _state_max_age seconds."""
+        try:
+            with open(self._state_path) as f:
+                state = json.load(f)
+        except (OSError, RuntimeError, ValueError):
+            return None
+        if not isinstance(state, dict) or state.get('target') != [self.ip, self.mac, self.hostname]:
+            return None
+        last_seen = state.get('last_seen')
+        if not isinstance(state.get('ip'), str) or isinstance(last_seen, bool) or not isinstance(last_seen, (int, float)):
+            return None
+        # A negative age means the clock went backwards (e.g. a Pi without an RTC booting), so it can't be trusted
+        if not 0 <= time.time() - last_seen <= self._state_max_age:
+            return None
+        return state
+
+    def _save_state(self):
+        """
+        Records the latest sighting. To spare SD cards the file is only rewritten when the ip changes or the
+        saved sighting is halfway to _state_max_age.
+        """
+        ip = self.strategy.last_ip or self.ip
+        now = time.time()
+        if self._saved_state and self._saved_state[0] == ip and now - self._saved_state[1] < self._state_max_age / 2:
+            return
+        # Set even if the write fails, so an unwritable path is retried (and logged) at the same slow pace
+        self._saved_state = (ip, now)
+        state = {'target': [self.ip, self.mac, self.hostname], 'ip': ip,
+                 'mac': self.mac, 'hostname': self.hostname, 'last_seen': now}
+        try:
+            state_path = self._state_path
+            tmp_path = state_path.with_suffix('.tmp')
+            state_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, state_path)
+        except (OSError, RuntimeError) as e:
+            logger.warning("Failed to save state to %s: %s", self._state_file, e)
+
+    async def monitor(self, cb: Callable, interval: float = 1., cb_on_change_only: Optional[bool] = False,
+                      sanitize_every: Optional[int] = None):
+        """
+        Checks for the target every interval seconds using the scanner's strategy. Ticks are scheduled against
+        a fixed deadline, so the time a scan takes comes out of the interval rather than adding to it.
+        If sanitize_every is set, the ARP table is flushed every that many ticks so departed hosts don't linger.
+        If a previous run saw the target within the last minute, the first tick starts with a plain ARP lookup
+        of its last ip before falling back to the strategy.
+        """
         state_is_connected: Optional[bool] = None
-        while True:
-            await self.scan_network()
-            if await self.on_network():
-                logger.info(f"{self.fullname} is on the network")
-                if cb and (not state_is_connected or not cb_on_change_only):
-                    await cb(ip=self.ip, mac=self.mac, hostname=self.hostname)
-                state_is_connected = True
-            else:
-                logger.info(f"{self.ip} is not on the network")
-                if cb and (state_is_connected or not cb_on_change_only):
-                    await cb(ip=None, mac=None, hostname=None)
-                state_is_connected = False
-            await asyncio.sleep(interval)
+        last_ip: Optional[str] = None
+        state = self._load_state()
+        if state:
+            last_ip = self.strategy.last_ip = state['ip']
+            state_is_connected = True
+            self._saved_state = (state['ip'], state['last_seen'])
+        self._bind_loop()
+        if self._scan_lock is None:
+            # Created here rather than in __init__ so it binds to the running loop on Python 3.9 and earlier
+            self._scan_lock = asyncio.Lock()
+        tick = 0
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        try:
+            while True:
+                next_tick += interval
+                tick += 1
+                # Monitors sharing a scanner take turns rather than sweeping the network on top of each other
+                async with self._scan_lock:
+                    if sanitize_every and tick % sanitize_every == 0:
+                        await self._flush_arp()
+                    seen_at_last_ip = bool(last_ip) and await IpScanStrategy(self, ip=last_ip).on_network()
+                    last_ip = None
+                    connected = seen_at_last_ip or await self.on_network()
+                    self._arp_cache = None
+                if connected:
+                    logger.info("%s is on the network", self._fullname)
+                    if cb and (not state_is_connected or not cb_on_change_only):
+                        await cb(ip=self.ip, mac=self.mac, hostname=self.hostname)
+                    state_is_connected = True
+                    self._save_state()
+                else:
+                    logger.info("%s is not on the network", self.ip)
+                    if cb and (state_is_connected or not cb_on_change_only):
+                        await cb(ip=None, mac=None, hostname=None)
+                    state_is_connected = False
+                delay = next_tick - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    # The tick overran the interval, so skip ahead instead of firing the missed ticks back to back
+                    next_tick = loop.time()
+        finally:
+            self.strategy.close()
+            if self._pinger is not None:
+                self._pinger.close()
+                self._pinger = None
 
 
 if __name__ == "__main__":
     # print(asyncio.run(scan_network()))
+    install_event_loop_policy()
     ns = NetworkScanner(ip='192.168.0.x', hostname='DIETPI', strategy=HostnameScanStrategy)
     async def report(ip=None, mac=None, hostname=None):
-        logger.info(f"cb: {ip} {mac} {hostname}")
+        logger.info("cb: %s %s %s", ip, mac, hostname)
     try:
         logger.info(asyncio.run(ns.monitor(cb=report)))
     finally:
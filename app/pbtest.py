@@ -1,10 +1,11 @@
 import pushbullet # type: ignore
 import argparse
 import asyncio
+import functools
 import os
 from secrets import token_urlsafe
 
-from network_scanner import NetworkScanner, HostnameScanStrategy
+from network_scanner import NetworkScanner, HostnameScanStrategy, install_event_loop_policy, logger
 
 def get_args():
     parser = argparse.ArgumentParser(description="Send a pushbullet notification")
@@ -23,10 +24,24 @@ if __name__ == "__main__":
 
     pb = pushbullet.Pushbullet(args.key, token_urlsafe(32))
 
+    install_event_loop_policy()
     ns = NetworkScanner(ip='192.168.0.x', hostname='DIETPI', strategy=HostnameScanStrategy)
 
+    # pb keeps one requests session, so pushes reuse its connection; only the body changes per call
+    push_note = functools.partial(pb.push_note, "Network Callback", device=args.device, channel=args.channel)
+
+    # Pushes run in the background so the next scan isn't held up by the HTTP request; keep them referenced until done
+    pending_pushes = set()
+
+    def on_push_done(fut):
+        pending_pushes.discard(fut)
+        if not fut.cancelled() and fut.exception():
+            logger.error("Push failed: %s", fut.exception())
+
     async def callback(ip=None, mac=None, hostname=None):
-        pb.push_note("Network Callback", f"IP: {ip} MAC: {mac} Hostname: {hostname}", device=args.device, channel=args.channel)
+        fut = asyncio.get_running_loop().run_in_executor(None, push_note, f"IP: {ip} MAC: {mac} Hostname: {hostname}")
+        pending_pushes.add(fut)
+        fut.add_done_callback(on_push_done)
 
     try:
         asyncio.run(ns.monitor(cb=callback, interval=5))